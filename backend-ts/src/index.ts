@@ -4,13 +4,16 @@
 
 import dotenv from "dotenv";
 import { serve } from "@hono/node-server";
+import { createReadStream } from "node:fs";
 import fs from "node:fs/promises";
 import path from "node:path";
+import { Readable } from "node:stream";
 import { fileURLToPath } from "node:url";
 import { Hono } from "hono";
+import { compress } from "hono/compress";
 import { cors } from "hono/cors";
 import { streamSSE } from "hono/streaming";
-import { runAgent, streamAgent, type EngineResponse, type SSEEvent } from "./mastra-engine.js";
+import type { EngineResponse } from "./mastra-engine.js";
 import * as sessions from "./sessions.js";
 import * as filesystem from "./tools/filesystem.js";
 
@@ -27,6 +30,16 @@ const FRONTEND_DIR = path.join(PROJECT_ROOT, "frontend");
 
 // ---------- Helpers ----------
 
+// The engine pulls in @mastra/core and the provider SDKs, which dominate
+// startup. Load it on demand (and warm it right after listen) so the port
+// opens without waiting for them.
+let enginePromise: Promise<typeof import("./mastra-engine.js")> | null = null;
+
+function loadEngine(): Promise<typeof import("./mastra-engine.js")> {
+  enginePromise ??= import("./mastra-engine.js");
+  return enginePromise;
+}
+
 const MIME_BY_EXT: Record<string, string> = {
   ".glsl": "text/plain", ".frag": "text/plain", ".vert": "text/plain",
   ".wgsl": "text/plain", ".obj": "text/plain", ".mtl": "text/plain",
@@ -41,6 +54,24 @@ function getMimeType(filePath: string): string {
   return MIME_BY_EXT[path.extname(filePath).toLowerCase()] ?? "application/octet-stream";
 }
 
+/** Files above this size are streamed from disk instead of buffered whole. */
+const STREAM_THRESHOLD_BYTES = 256 * 1024;
+
+/**
+ * Response body for a file: a Buffer for small files, a chunked stream for
+ * large ones. Readable.toWeb only reads ahead while the consumer has room,
+ * so a slow client doesn't pull the whole file into memory.
+ */
+async function fileBody(full: string, size: number): Promise<Buffer | ReadableStream<Uint8Array>> {
+  if (size <= STREAM_THRESHOLD_BYTES) return fs.readFile(full);
+  return Readable.toWeb(createReadStream(full)) as ReadableStream<Uint8Array>;
+}
+
+const HTML_DOC_RE = /<!DOCTYPE|<html/i;
+const TITLE_RE = /<title>([^<]*)<\/title>/i;
+const SLUG_SEP_RE = /[^a-z0-9]+/g;
+const SLUG_TRIM_RE = /^-|-$/g;
+
 /** If agent returned HTML in a code block but wrote no files, auto-save to workspace. */
 async function autoSaveHtml(
   codeBlocks: { language: string; code: string }[],
@@ -50,17 +81,17 @@ async function autoSaveHtml(
   if (filesChanged.length > 0) return filesChanged;
   for (const block of codeBlocks) {
     const code = block.code ?? "";
-    if (code.includes("<!DOCTYPE") || code.includes("<html")) {
-      const titleMatch = code.match(/<title>([^<]*)<\/title>/i);
+    if (HTML_DOC_RE.test(code)) {
+      const titleMatch = TITLE_RE.exec(code);
       let name = "sketch.html";
       if (titleMatch) {
         const slug = titleMatch[1].trim().toLowerCase()
-          .replace(/[^a-z0-9]+/g, "-").replace(/^-|-$/g, "").slice(0, 40);
+          .replace(SLUG_SEP_RE, "-").replace(SLUG_TRIM_RE, "").slice(0, 40);
         if (slug) name = `${slug}.html`;
       }
       try {
         const full = path.resolve(workspacePath, name);
-        if (!full.startsWith(path.resolve(workspacePath))) continue;
+        if (!filesystem.isWithinRoot(full, path.resolve(workspacePath))) continue;
         await fs.mkdir(path.dirname(full), { recursive: true });
         await fs.writeFile(full, code, "utf-8");
         return [name];
@@ -97,6 +128,7 @@ async function handleChat(body: ChatBody): Promise<ChatResult> {
   const history = sessions.getSession(sessionId).slice(0, -1);
 
   try {
+    const { runAgent } = await loadEngine();
     const response = await runAgent(body.message, history, workspacePath, body.model ?? null, body.preview_file);
     const filesChanged = await autoSaveHtml(response.code_blocks, response.files_changed, workspacePath);
     sessions.appendToSession(sessionId, "assistant", response.text);
@@ -124,12 +156,25 @@ async function handleChat(body: ChatBody): Promise<ChatResult> {
 
 const app = new Hono();
 app.use("*", cors({ origin: "*", allowMethods: ["GET", "POST", "DELETE"], allowHeaders: ["Content-Type"] }));
+// gzip/deflate when the client asks; Hono skips non-compressible types and SSE
+app.use("*", compress());
 
 // Frontend
+const INDEX_HTML_PATH = path.join(FRONTEND_DIR, "index.html");
+let indexHtmlCache: { mtimeMs: number; html: string } | null = null;
+
+/** index.html, re-read only when its mtime changes (so edits still show up in dev). */
+async function getIndexHtml(): Promise<string> {
+  const { mtimeMs } = await fs.stat(INDEX_HTML_PATH);
+  if (indexHtmlCache?.mtimeMs !== mtimeMs) {
+    indexHtmlCache = { mtimeMs, html: await fs.readFile(INDEX_HTML_PATH, "utf-8") };
+  }
+  return indexHtmlCache.html;
+}
+
 app.get("/", async (c) => {
   try {
-    const html = await fs.readFile(path.join(FRONTEND_DIR, "index.html"), "utf-8");
-    return c.html(html);
+    return c.html(await getIndexHtml());
   } catch {
     return c.text("Frontend not found. Run from project root.", 404);
   }
@@ -138,12 +183,15 @@ app.get("/", async (c) => {
 app.get("/static/*", async (c) => {
   const p = c.req.path.slice("/static".length) || "/";
   const full = path.join(FRONTEND_DIR, p);
-  if (!path.resolve(full).startsWith(path.resolve(FRONTEND_DIR))) return c.json({ error: "Forbidden" }, 403);
+  if (!filesystem.isWithinRoot(path.resolve(full), path.resolve(FRONTEND_DIR))) return c.json({ error: "Forbidden" }, 403);
   try {
     const stat = await fs.stat(full);
     if (stat.isDirectory()) return c.json({ error: "Not found" }, 404);
-    const content = await fs.readFile(full);
-    return c.body(content, 200, { "Content-Type": getMimeType(full), "Cache-Control": "no-cache" });
+    const content = await fileBody(full, stat.size);
+    return c.body(content, 200, {
+      "Content-Type": getMimeType(full),
+      "Cache-Control": "no-cache",
+    });
   } catch {
     return c.json({ error: "Not found" }, 404);
   }
@@ -154,18 +202,7 @@ app.get("/api/workspace/entries", async (c) => {
   const pathParam = c.req.query("path") ?? ".";
   const workspacePath = c.req.query("workspace_path") ?? DEFAULT_WORKSPACE;
   try {
-    const raw = await filesystem.listFiles(pathParam, workspacePath, false);
-    const entries: { name: string; type: string }[] = [];
-    for (const line of raw.trim().split("\n")) {
-      const trimmed = line.trim();
-      if ((trimmed.startsWith("├── ") || trimmed.startsWith("└── ")) && trimmed !== "(permission denied)") {
-        const name = trimmed.slice(4);
-        if (name) {
-          const isDir = name.endsWith("/");
-          entries.push({ name: name.replace(/\/$/, ""), type: isDir ? "directory" : "file" });
-        }
-      }
-    }
+    const entries = await filesystem.listEntries(pathParam, workspacePath);
     return c.json({ path: pathParam, entries });
   } catch (e) {
     return c.json({ error: e instanceof Error ? e.message : String(e) }, 500);
@@ -177,11 +214,11 @@ app.get("/api/workspace/files/*", async (c) => {
   const workspacePath = c.req.query("workspace_path") ?? DEFAULT_WORKSPACE;
   const rootResolved = path.resolve(workspacePath);
   const full = path.resolve(rootResolved, filePath);
-  if (!full.startsWith(rootResolved)) return c.json({ error: "Path escapes workspace" }, 403);
+  if (!filesystem.isWithinRoot(full, rootResolved)) return c.json({ error: "Path escapes workspace" }, 403);
   try {
     const stat = await fs.stat(full);
     if (!stat.isFile()) return c.json({ error: `File not found: ${filePath}` }, 404);
-    const content = await fs.readFile(full);
+    const content = await fileBody(full, stat.size);
     return c.body(content, 200, {
       "Content-Type": getMimeType(full),
       "Cache-Control": "no-cache",
@@ -207,12 +244,15 @@ app.post("/api/chat/stream", async (c) => {
   sessions.appendToSession(sessionId, "user", body.message);
   const history = sessions.getSession(sessionId).slice(0, -1);
 
+  // Stop reverse proxies (nginx) from buffering the event stream
+  c.header("X-Accel-Buffering", "no");
   return streamSSE(c, async (sseStream) => {
     const send = async (event: string, data: unknown) => {
       await sseStream.writeSSE({ event, data: JSON.stringify(data) });
     };
 
     try {
+      const { streamAgent } = await loadEngine();
       for await (const event of streamAgent(
         body.message, history, workspacePath, body.model ?? null, body.preview_file
       )) {
@@ -258,3 +298,9 @@ app.delete("/api/sessions/:sessionId", (c) => {
 const PORT = Number(process.env.PORT) || 3000;
 console.log(`Chatooli (Mastra) running at http://localhost:${PORT}`);
 serve({ fetch: app.fetch, port: PORT });
+// Node caches a failed module load, so a later import can't recover; exit
+// as the old eager import did instead of answering every chat with a 500
+loadEngine().catch((e) => {
+  console.error("Failed to load agent engine:", e);
+  process.exit(1);
+});
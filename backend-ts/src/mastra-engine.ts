@@ -36,7 +36,7 @@ export interface EngineResponse {
 // ---------- Model resolution ----------
 
 /** Reasoning model patterns. */
-const OPENAI_REASONING_MODELS = ["o1", "o3", "o3-mini", "o4-mini"];
+const OPENAI_REASONING_MODELS = new Set(["o1", "o3", "o3-mini", "o4-mini"]);
 const ANTHROPIC_THINKING_SUFFIX = "-thinking";
 
 interface ResolvedModel {
@@ -63,8 +63,8 @@ function resolveModel(modelId: string | null): ResolvedModel {
   }
 
   // OpenAI reasoning models (o1, o3, o3-mini, etc.)
-  const isOpenAiReasoning = OPENAI_REASONING_MODELS.some(
-    (m) => name === m || name === `openai/${m}`
+  const isOpenAiReasoning = OPENAI_REASONING_MODELS.has(
+    name.startsWith("openai/") ? name.slice("openai/".length) : name
   );
   if (isOpenAiReasoning) {
     const id = name.includes("/") ? name : `openai/${name}`;
@@ -84,6 +84,48 @@ function resolveModel(modelId: string | null): ResolvedModel {
   return { modelId: `openai/${name}`, isReasoning: false };
 }
 
+// ---------- Tool input schemas ----------
+
+// Built once at load and shared by every per-request tool set.
+const LIST_FILES_SCHEMA = z.object({
+  path: z.string().default("."),
+  recursive: z.boolean().default(false),
+});
+const READ_FILE_SCHEMA = z.object({ path: z.string().describe("Relative path to file") });
+const READ_FILES_SCHEMA = z.object({
+  paths: z.array(z.string()).min(1).describe("Relative paths of the files to read"),
+});
+const WRITE_FILE_SCHEMA = z.object({
+  path: z.string().describe("Relative path to the file, e.g. index.html or src/sketch.js"),
+  content: z.string().default("").describe("The complete file content to write. Required."),
+});
+const EDIT_FILE_SCHEMA = z.object({
+  path: z.string(),
+  old_string: z.string(),
+  new_string: z.string(),
+});
+const GLOB_FILES_SCHEMA = z.object({ pattern: z.string() });
+const GREP_FILES_SCHEMA = z.object({
+  pattern: z.string(),
+  glob_pattern: z.string().default("**/*"),
+});
+const EXECUTE_PYTHON_SCHEMA = z.object({ code: z.string() });
+const CONSULT_ART_DIRECTOR_SCHEMA = z.object({
+  request: z.string().describe(
+    "What you need the Art Director's input on. Include the user's request " +
+    "and any relevant context about the current workspace state."
+  ),
+});
+const SET_PREVIEW_SCHEMA = z.object({
+  path: z.string().describe("Relative path to the file to preview, e.g. index.html or sketches/demo.html"),
+});
+const EMPTY_SCHEMA = z.object({});
+
+/** Tools report failures to the model as text rather than throwing. */
+function toolError(e: unknown): string {
+  return `Error: ${e instanceof Error ? e.message : e}`;
+}
+
 // ---------- Art Director ----------
 
 const ART_DIRECTOR_MAX_STEPS = 8;
@@ -96,15 +138,12 @@ function createArtDirectorTools(workspacePath: string) {
       id: "list_files",
       description:
         "List files and directories at path (relative to workspace). Use recursive=True for full tree.",
-      inputSchema: z.object({
-        path: z.string().default("."),
-        recursive: z.boolean().default(false),
-      }),
+      inputSchema: LIST_FILES_SCHEMA,
       execute: async (inputData) => {
         try {
           return await fs.listFiles(inputData.path, root, inputData.recursive);
         } catch (e) {
-          return `Error: ${e instanceof Error ? e.message : e}`;
+          return toolError(e);
         }
       },
     }),
@@ -112,18 +151,49 @@ function createArtDirectorTools(workspacePath: string) {
       id: "read_file",
       description:
         "Read a file from the workspace. path is relative to the workspace root.",
-      inputSchema: z.object({ path: z.string().describe("Relative path to file") }),
+      inputSchema: READ_FILE_SCHEMA,
       execute: async (inputData) => {
         try {
           return await fs.readFile(inputData.path, root);
         } catch (e) {
-          return `Error: ${e instanceof Error ? e.message : e}`;
+          return toolError(e);
         }
       },
     }),
   };
 }
 
+function createArtDirectorAgent(modelId: string, workspacePath: string) {
+  return new Agent({
+    id: "chatooli-art-director",
+    name: "Chatooli Art Director",
+    instructions: getArtDirectorPrompt(),
+    model: modelId,
+    tools: createArtDirectorTools(workspacePath),
+  });
+}
+
+/**
+ * Art Director agents, keyed by model + workspace. Its instructions and
+ * read-only tools hold no per-request state, so one instance (and its
+ * provider client) is reused across turns instead of rebuilt per call.
+ */
+const ART_DIRECTOR_CACHE_SIZE = 16;
+const artDirectorAgents = new Map<string, ReturnType<typeof createArtDirectorAgent>>();
+
+function getArtDirectorAgent(modelId: string, workspacePath: string) {
+  const key = `${modelId}\0${workspacePath}`;
+  let agent = artDirectorAgents.get(key);
+  if (!agent) {
+    agent = createArtDirectorAgent(modelId, workspacePath);
+    if (artDirectorAgents.size >= ART_DIRECTOR_CACHE_SIZE) {
+      artDirectorAgents.delete(artDirectorAgents.keys().next().value!);
+    }
+    artDirectorAgents.set(key, agent);
+  }
+  return agent;
+}
+
 /**
  * Run the Art Director agent to produce a design brief.
  * The Art Director has read-only workspace access and returns a structured brief.
@@ -134,16 +204,7 @@ export async function runArtDirector(
   model: string | null
 ): Promise<string> {
   const resolved = resolveModel(model);
-  const tools = createArtDirectorTools(workspacePath);
-  const prompt = getArtDirectorPrompt();
-
-  const agent = new Agent({
-    id: "chatooli-art-director",
-    name: "Chatooli Art Director",
-    instructions: prompt,
-    model: resolved.modelId,
-    tools,
-  });
+  const agent = getArtDirectorAgent(resolved.modelId, workspacePath);
 
   const result = await agent.generate(
     [{ role: "user" as const, content: request }],
@@ -177,12 +238,26 @@ function createMastraTools(ctx: ToolContext) {
       id: "read_file",
       description:
         "Read a file from the workspace. path is relative to the workspace root (e.g. src/main.py).",
-      inputSchema: z.object({ path: z.string().describe("Relative path to file") }),
+      inputSchema: READ_FILE_SCHEMA,
       execute: async (inputData) => {
         try {
           return await fs.readFile(inputData.path, root);
         } catch (e) {
-          return `Error: ${e instanceof Error ? e.message : e}`;
+          return toolError(e);
+        }
+      },
+    }),
+    read_files: createTool({
+      id: "read_files",
+      description:
+        "Read several workspace files at once (faster than repeated read_file calls). " +
+        "paths are relative to the workspace root.",
+      inputSchema: READ_FILES_SCHEMA,
+      execute: async (inputData) => {
+        try {
+          return await fs.readFiles(inputData.paths, root);
+        } catch (e) {
+          return toolError(e);
         }
       },
     }),
@@ -190,10 +265,7 @@ function createMastraTools(ctx: ToolContext) {
       id: "write_file",
       description:
         "Create or overwrite a file in the workspace. path is relative; creates directories if needed. You must provide both path and content (the full file body).",
-      inputSchema: z.object({
-        path: z.string().describe("Relative path to the file, e.g. index.html or src/sketch.js"),
-        content: z.string().default("").describe("The complete file content to write. Required."),
-      }),
+      inputSchema: WRITE_FILE_SCHEMA,
       execute: async (inputData) => {
         if (
           inputData.content === undefined ||
@@ -207,18 +279,14 @@ function createMastraTools(ctx: ToolContext) {
           filesChanged.push(inputData.path);
           return out;
         } catch (e) {
-          return `Error: ${e instanceof Error ? e.message : e}`;
+          return toolError(e);
         }
       },
     }),
     edit_file: createTool({
       id: "edit_file",
       description: "Replace the first occurrence of old_string with new_string in the file at path.",
-      inputSchema: z.object({
-        path: z.string(),
-        old_string: z.string(),
-        new_string: z.string(),
-      }),
+      inputSchema: EDIT_FILE_SCHEMA,
       execute: async (inputData) => {
         try {
           const out = await fs.editFile(
@@ -230,7 +298,7 @@ function createMastraTools(ctx: ToolContext) {
           filesChanged.push(inputData.path);
           return out;
         } catch (e) {
-          return `Error: ${e instanceof Error ? e.message : e}`;
+          return toolError(e);
         }
       },
     }),
@@ -238,15 +306,12 @@ function createMastraTools(ctx: ToolContext) {
       id: "list_files",
       description:
         "List files and directories at path (relative to workspace). Use recursive=True for full tree.",
-      inputSchema: z.object({
-        path: z.string().default("."),
-        recursive: z.boolean().default(false),
-      }),
+      inputSchema: LIST_FILES_SCHEMA,
       execute: async (inputData) => {
         try {
           return await fs.listFiles(inputData.path, root, inputData.recursive);
         } catch (e) {
-          return `Error: ${e instanceof Error ? e.message : e}`;
+          return toolError(e);
         }
       },
     }),
@@ -254,12 +319,12 @@ function createMastraTools(ctx: ToolContext) {
       id: "glob_files",
       description:
         "Find files matching glob pattern (e.g. **/*.py). Returns newline-separated paths.",
-      inputSchema: z.object({ pattern: z.string() }),
+      inputSchema: GLOB_FILES_SCHEMA,
       execute: async (inputData) => {
         try {
           return await fs.globFiles(inputData.pattern, root);
         } catch (e) {
-          return `Error: ${e instanceof Error ? e.message : e}`;
+          return toolError(e);
         }
       },
     }),
@@ -267,15 +332,12 @@ function createMastraTools(ctx: ToolContext) {
       id: "grep_files",
       description:
         "Search file contents for regex pattern. Optional glob_pattern to limit files (default all).",
-      inputSchema: z.object({
-        pattern: z.string(),
-        glob_pattern: z.string().default("**/*"),
-      }),
+      inputSchema: GREP_FILES_SCHEMA,
       execute: async (inputData) => {
         try {
           return await fs.grepFiles(inputData.pattern, root, inputData.glob_pattern);
         } catch (e) {
-          return `Error: ${e instanceof Error ? e.message : e}`;
+          return toolError(e);
         }
       },
     }),
@@ -283,12 +345,12 @@ function createMastraTools(ctx: ToolContext) {
       id: "execute_python_code",
       description:
         "Execute Python code in a sandbox and return the output. Use for running scripts or computations.",
-      inputSchema: z.object({ code: z.string() }),
+      inputSchema: EXECUTE_PYTHON_SCHEMA,
       execute: async (inputData) => {
         try {
           return await executePythonCode(inputData.code);
         } catch (e) {
-          return `Error: ${e instanceof Error ? e.message : e}`;
+          return toolError(e);
         }
       },
     }),
@@ -299,12 +361,7 @@ function createMastraTools(ctx: ToolContext) {
         "Use for new creative work, major visual changes, or when you need design guidance. " +
         "Pass a clear description of what you need direction on, including relevant context " +
         "about what exists and what the user wants. Returns a structured design brief.",
-      inputSchema: z.object({
-        request: z.string().describe(
-          "What you need the Art Director's input on. Include the user's request " +
-          "and any relevant context about the current workspace state."
-        ),
-      }),
+      inputSchema: CONSULT_ART_DIRECTOR_SCHEMA,
       execute: async (inputData) => {
         try {
           return await runArtDirector(inputData.request, root, model);
@@ -318,9 +375,7 @@ function createMastraTools(ctx: ToolContext) {
       description:
         "Set which file to show in the preview iframe. Use after writing or editing files " +
         "to control which HTML file the user sees. The path is relative to the workspace.",
-      inputSchema: z.object({
-        path: z.string().describe("Relative path to the file to preview, e.g. index.html or sketches/demo.html"),
-      }),
+      inputSchema: SET_PREVIEW_SCHEMA,
       execute: async (inputData) => {
         ctx.requestedPreviewFile = inputData.path;
         return `Preview set to: ${inputData.path}`;
@@ -332,7 +387,7 @@ function createMastraTools(ctx: ToolContext) {
         "Get the current preview state: which file is shown in the preview iframe " +
         "and which HTML files exist in the workspace. Use to understand what the user " +
         "is currently looking at before making changes.",
-      inputSchema: z.object({}),
+      inputSchema: EMPTY_SCHEMA,
       execute: async () => {
         try {
           const allFiles = await fs.globFiles("**/*.html", root);
@@ -343,7 +398,7 @@ function createMastraTools(ctx: ToolContext) {
             html_files: htmlFiles,
           });
         } catch (e) {
-          return `Error: ${e instanceof Error ? e.message : e}`;
+          return toolError(e);
         }
       },
     }),
@@ -352,13 +407,25 @@ function createMastraTools(ctx: ToolContext) {
 
 // ---------- Shared setup ----------
 
+interface ChatMessage {
+  role: "user" | "assistant";
+  content: string;
+  providerOptions?: Record<string, unknown>;
+}
+
+/** Anthropic prompt-cache breakpoint; everything up to the marked message is cached. */
+const ANTHROPIC_CACHE_CONTROL = { anthropic: { cacheControl: { type: "ephemeral" } } };
+
 function buildMessages(
   history: HistoryMessage[],
-  currentMessage: string
-): { role: "user" | "assistant"; content: string }[] {
-  const messages: { role: "user" | "assistant"; content: string }[] = [];
-  for (const h of history) {
-    messages.push({ role: h.role, content: h.content });
+  currentMessage: string,
+  modelId: string
+): ChatMessage[] {
+  const messages: ChatMessage[] = history.map((h) => ({ role: h.role, content: h.content }));
+  // Mark the end of the prior conversation so each turn re-reads the
+  // system prompt + history from Anthropic's cache instead of re-processing it.
+  if (messages.length > 0 && modelId.startsWith("anthropic/")) {
+    messages[messages.length - 1].providerOptions = ANTHROPIC_CACHE_CONTROL;
   }
   messages.push({ role: "user", content: currentMessage });
   return messages;
@@ -373,8 +440,10 @@ async function buildAgent(
 ) {
   const tools = createMastraTools(toolCtx);
   const resolved = resolveModel(model);
-  const systemPrompt = await getSystemPrompt();
-  const { names: skillsUsed, context: skillContext } = await getMatchedSkills(message);
+  const [systemPrompt, { names: skillsUsed, context: skillContext }] = await Promise.all([
+    getSystemPrompt(),
+    getMatchedSkills(message),
+  ]);
 
   const parts = [systemPrompt];
   if (skillContext) parts.push(skillContext);
@@ -433,7 +502,7 @@ export async function runAgent(
   const { agent, resolved, skillsUsed } = await buildAgent(
     message, workspacePath, model, toolCtx, designBrief || undefined
   );
-  const messages = buildMessages(history, message);
+  const messages = buildMessages(history, message, resolved.modelId);
 
   const result = await agent.generate(messages as Parameters<Agent["generate"]>[0], {
     maxSteps: MAX_STEPS,
@@ -538,7 +607,7 @@ export async function* streamAgent(
     yield { type: "skills", data: { skills: skillsUsed } };
   }
 
-  const messages = buildMessages(history, message);
+  const messages = buildMessages(history, message, resolved.modelId);
   let stepCount = 0;
 
   const stream = await agent.stream(messages as Parameters<Agent["stream"]>[0], {
@@ -558,13 +627,13 @@ export async function* streamAgent(
 
   let fullText = "";
   let currentToolName = "";
-  const startTime = Date.now();
+  const startTime = performance.now();
 
   try {
     for await (const chunk of stream.fullStream) {
       // Timeout guard
-      if (Date.now() - startTime > STREAM_TIMEOUT_MS) {
-        console.warn(`[stream] timeout after ${Math.round((Date.now() - startTime) / 1000)}s`);
+      if (performance.now() - startTime > STREAM_TIMEOUT_MS) {
+        console.warn(`[stream] timeout after ${Math.round((performance.now() - startTime) / 1000)}s`);
         break;
       }
 
@@ -611,11 +680,11 @@ export async function* streamAgent(
           break;
         }
         case "step-start": {
-          console.log(`[stream] step started (elapsed: ${Math.round((Date.now() - startTime) / 1000)}s)`);
+          console.log(`[stream] step started (elapsed: ${Math.round((performance.now() - startTime) / 1000)}s)`);
           break;
         }
         case "step-finish": {
-          console.log(`[stream] step finished (elapsed: ${Math.round((Date.now() - startTime) / 1000)}s)`);
+          console.log(`[stream] step finished (elapsed: ${Math.round((performance.now() - startTime) / 1000)}s)`);
           break;
         }
       }
@@ -628,7 +697,7 @@ export async function* streamAgent(
     }
   }
 
-  const elapsed = Math.round((Date.now() - startTime) / 1000);
+  const elapsed = Math.round((performance.now() - startTime) / 1000);
   console.log(`[stream] complete: ${elapsed}s, ${stepCount} steps, ${toolCalls.length} tool calls, ${fullText.length} chars`);
 
   const codeBlocks = extractCodeBlocks(fullText);
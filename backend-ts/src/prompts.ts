@@ -16,6 +16,7 @@ import path from "node:path";
 import { fileURLToPath } from "node:url";
 import {
   loadSkills,
+  skillsFingerprint,
   formatSkillsIndex,
   matchSkills,
   formatMatchedSkills,
@@ -24,6 +25,7 @@ import {
 
 const __dirname = path.dirname(fileURLToPath(import.meta.url));
 const PROMPTS_DIR = path.resolve(__dirname, "prompts");
+const SKILLS_DIR = path.resolve(__dirname, "..", "..", "skills");
 
 // ---------- Prompt file loader ----------
 
@@ -35,14 +37,35 @@ function loadPromptFile(filename: string): string {
 // ---------- Caches ----------
 
 let _cachedSkills: Skill[] | null = null;
+let _skillsFingerprint = "";
+let _skillsCheckedAt = 0;
 let _cachedSystemPrompt: string | null = null;
 let _cachedArtDirectorPrompt: string | null = null;
 
-/** Load skills from disk (cached after first call). */
+/** Skills edits are picked up within this window; a chat turn calls getSkills twice. */
+const SKILLS_RECHECK_MS = 2000;
+
+/** Formatted Level 2+3 context, keyed by the matched skill names. */
+const MATCHED_CONTEXT_CACHE_SIZE = 32;
+const _matchedContextCache = new Map<string, string>();
+
+/**
+ * Load skills from disk, cached until a SKILL.md or reference file changes
+ * (mtime/size). The fingerprint itself is re-checked at most every
+ * SKILLS_RECHECK_MS. A reload also drops everything derived from the old skills.
+ */
 async function getSkills(): Promise<Skill[]> {
-  if (_cachedSkills) return _cachedSkills;
-  const skillsDir = path.resolve(__dirname, "..", "..", "skills");
-  _cachedSkills = await loadSkills(skillsDir);
+  const now = performance.now();
+  if (_cachedSkills && now - _skillsCheckedAt < SKILLS_RECHECK_MS) return _cachedSkills;
+  _skillsCheckedAt = now;
+
+  const fingerprint = await skillsFingerprint(SKILLS_DIR);
+  if (_cachedSkills && fingerprint === _skillsFingerprint) return _cachedSkills;
+
+  _cachedSkills = await loadSkills(SKILLS_DIR);
+  _skillsFingerprint = fingerprint;
+  _cachedSystemPrompt = null;
+  _matchedContextCache.clear();
   return _cachedSkills;
 }
 
@@ -53,10 +76,10 @@ async function getSkills(): Promise<Skill[]> {
  * Loads from prompts/coding-agent.md + appends skill frontmatters.
  */
 export async function getSystemPrompt(): Promise<string> {
+  const skills = await getSkills();
   if (_cachedSystemPrompt) return _cachedSystemPrompt;
 
   const basePrompt = loadPromptFile("coding-agent.md");
-  const skills = await getSkills();
   const skillsIndex = formatSkillsIndex(skills);
 
   _cachedSystemPrompt = skillsIndex
@@ -74,11 +97,22 @@ export async function getMatchedSkills(
   userMessage: string
 ): Promise<{ names: string[]; context: string }> {
   const skills = await getSkills();
+  if (skills.length === 0) return { names: [], context: "" };
+
   const matched = matchSkills(skills, userMessage);
-  return {
-    names: matched.map((s) => s.name),
-    context: formatMatchedSkills(matched),
-  };
+  const names = matched.map((s) => s.name);
+  const key = names.join("\0");
+
+  let context = _matchedContextCache.get(key);
+  if (context === undefined) {
+    context = formatMatchedSkills(matched);
+    if (_matchedContextCache.size >= MATCHED_CONTEXT_CACHE_SIZE) {
+      // Evict the oldest entry (Map preserves insertion order)
+      _matchedContextCache.delete(_matchedContextCache.keys().next().value!);
+    }
+    _matchedContextCache.set(key, context);
+  }
+  return { names, context };
 }
 
 /**
@@ -1,5 +1,8 @@
 /**
  * In-memory session store for chat history.
+ *
+ * Bounded LRU: once CHATOOLI_MAX_SESSIONS sessions exist, the least recently
+ * used one is dropped when a new session is created.
  */
 
 export interface HistoryMessage {
@@ -7,15 +10,36 @@ export interface HistoryMessage {
   content: string;
 }
 
+const DEFAULT_MAX_SESSIONS = 1024;
+
+/** Read lazily: this module is imported before index.ts loads .env. */
+function maxSessions(): number {
+  return Number(process.env.CHATOOLI_MAX_SESSIONS) || DEFAULT_MAX_SESSIONS;
+}
+
+// Map iteration order is insertion order; re-inserting on access keeps the
+// most recently used session last and the eviction candidate first.
 const sessions = new Map<string, HistoryMessage[]>();
 
+function touch(sessionId: string): HistoryMessage[] | undefined {
+  const history = sessions.get(sessionId);
+  if (history) {
+    sessions.delete(sessionId);
+    sessions.set(sessionId, history);
+  }
+  return history;
+}
+
 export function getSession(sessionId: string): HistoryMessage[] {
-  return sessions.get(sessionId) ?? [];
+  return touch(sessionId) ?? [];
 }
 
 export function appendToSession(sessionId: string, role: "user" | "assistant", content: string): void {
-  let history = sessions.get(sessionId);
+  let history = touch(sessionId);
   if (!history) {
+    if (sessions.size >= maxSessions()) {
+      sessions.delete(sessions.keys().next().value!);
+    }
     history = [];
     sessions.set(sessionId, history);
   }
@@ -19,10 +19,14 @@ export interface Skill {
   keywords: string[];
 }
 
+const FRONTMATTER_RE = /^---\s*\n([\s\S]*?)\n---\s*\n([\s\S]*)$/;
+const NAME_RE = /^name:\s*(.+)$/m;
+const DESC_BLOCK_RE = /^description:\s*>?\s*\n((?:\s{2,}.+\n?)*)/m;
+const DESC_LINE_RE = /^description:\s*(.+)$/m;
+
 /** Parse a SKILL.md file into frontmatter fields + body. */
 function parseSkillMd(raw: string): Omit<Skill, "references"> {
-  const fmRegex = /^---\s*\n([\s\S]*?)\n---\s*\n([\s\S]*)$/;
-  const match = raw.match(fmRegex);
+  const match = raw.match(FRONTMATTER_RE);
   if (!match) {
     return { name: "unknown", description: "", body: raw.trim(), keywords: [] };
   }
@@ -33,14 +37,14 @@ function parseSkillMd(raw: string): Omit<Skill, "references"> {
   let name = "unknown";
   let description = "";
 
-  const nameMatch = frontmatter.match(/^name:\s*(.+)$/m);
+  const nameMatch = frontmatter.match(NAME_RE);
   if (nameMatch) name = nameMatch[1].trim();
 
-  const descBlock = frontmatter.match(/^description:\s*>?\s*\n((?:\s{2,}.+\n?)*)/m);
+  const descBlock = frontmatter.match(DESC_BLOCK_RE);
   if (descBlock) {
     description = descBlock[1].replace(/^\s{2,}/gm, "").trim().replace(/\n/g, " ");
   } else {
-    const descLine = frontmatter.match(/^description:\s*(.+)$/m);
+    const descLine = frontmatter.match(DESC_LINE_RE);
     if (descLine) description = descLine[1].trim();
   }
 
@@ -98,50 +102,89 @@ function extractKeywords(description: string): string[] {
 /** Load references/ directory for a skill. */
 async function loadReferences(skillDir: string): Promise<{ name: string; content: string }[]> {
   const refsDir = path.join(skillDir, "references");
-  const refs: { name: string; content: string }[] = [];
 
+  let entries: string[];
   try {
-    const entries = await fs.readdir(refsDir);
-    for (const entry of entries) {
+    entries = await fs.readdir(refsDir);
+  } catch {
+    return []; // no references/ directory — fine
+  }
+
+  const refs = await Promise.all(
+    entries.map(async (entry) => {
       const full = path.join(refsDir, entry);
       try {
         const stat = await fs.stat(full);
         if (stat.isFile() && entry.endsWith(".md")) {
           const content = await fs.readFile(full, "utf-8");
-          refs.push({ name: entry, content: content.trim() });
+          return { name: entry, content: content.trim() };
         }
       } catch { /* skip unreadable files */ }
-    }
-  } catch { /* no references/ directory — fine */ }
-
-  return refs;
+      return null;
+    })
+  );
+  return refs.filter((r) => r !== null);
 }
 
-/** Load all SKILL.md files from a skills directory. */
+/** Load all SKILL.md files from a skills directory (read concurrently, directory order kept). */
 export async function loadSkills(skillsDir: string): Promise<Skill[]> {
-  const skills: Skill[] = [];
-
   let entries: string[];
   try {
     entries = await fs.readdir(skillsDir);
   } catch {
-    return skills;
+    return [];
   }
 
-  for (const entry of entries) {
-    const skillDir = path.join(skillsDir, entry);
-    const skillFile = path.join(skillDir, "SKILL.md");
-    try {
-      const raw = await fs.readFile(skillFile, "utf-8");
-      const parsed = parseSkillMd(raw);
-      const references = await loadReferences(skillDir);
-      skills.push({ ...parsed, references });
-    } catch {
-      // No SKILL.md in this directory — skip
-    }
+  const skills = await Promise.all(
+    entries.map(async (entry): Promise<Skill | null> => {
+      const skillDir = path.join(skillsDir, entry);
+      const skillFile = path.join(skillDir, "SKILL.md");
+      try {
+        const [raw, references] = await Promise.all([
+          fs.readFile(skillFile, "utf-8"),
+          loadReferences(skillDir),
+        ]);
+        return { ...parseSkillMd(raw), references };
+      } catch {
+        return null; // No SKILL.md in this directory — skip
+      }
+    })
+  );
+
+  return skills.filter((s) => s !== null);
+}
+
+/**
+ * Cheap change detector for a skills directory: one stat per SKILL.md and
+ * reference file, no reads. An unchanged fingerprint means loadSkills()
+ * would return the same skills.
+ */
+export async function skillsFingerprint(skillsDir: string): Promise<string> {
+  let entries: string[];
+  try {
+    entries = await fs.readdir(skillsDir);
+  } catch {
+    return "";
   }
 
-  return skills;
+  const statKey = async (full: string): Promise<string> => {
+    const stat = await fs.stat(full).catch(() => null);
+    return stat ? `${full}:${stat.mtimeMs}:${stat.size}` : "";
+  };
+
+  const parts = await Promise.all(
+    entries.map(async (entry) => {
+      const skillDir = path.join(skillsDir, entry);
+      const refsDir = path.join(skillDir, "references");
+      const refs = await fs.readdir(refsDir).catch(() => [] as string[]);
+      const keys = await Promise.all([
+        statKey(path.join(skillDir, "SKILL.md")),
+        ...refs.map((r) => statKey(path.join(refsDir, r))),
+      ]);
+      return keys.join("|");
+    })
+  );
+  return parts.join("|");
 }
 
 /**
@@ -171,12 +214,15 @@ export function formatSkillsIndex(skills: Skill[]): string {
  * Uses keyword matching with stemming for robust matching.
  * A skill matches if the user message contains at least 1 domain-specific keyword.
  */
+const MSG_NON_WORD_RE = /[^a-z0-9\s]/g;
+const WHITESPACE_RE = /\s+/;
+
 export function matchSkills(skills: Skill[], userMessage: string): Skill[] {
   const msg = userMessage.toLowerCase();
   // Build a set of stemmed words from the user message for O(1) lookup
   const msgWords = new Set(
-    msg.replace(/[^a-z0-9\s]/g, " ")
-      .split(/\s+/)
+    msg.replace(MSG_NON_WORD_RE, " ")
+      .split(WHITESPACE_RE)
       .filter((w) => w.length > 2)
       .flatMap((w) => [w, stem(w)])
   );
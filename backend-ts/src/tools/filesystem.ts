@@ -2,15 +2,25 @@
  * Filesystem tools. All paths are relative to a workspace root.
  */
 
+import { createReadStream } from "node:fs";
 import fs from "node:fs/promises";
 import path from "node:path";
 
 const WORKSPACE_ROOT = process.env.CHATOOLI_WORKSPACE || path.resolve(process.cwd(), "workspace");
 
+/**
+ * True if the absolute path `full` is `rootResolved` or inside it. A bare
+ * prefix test would also accept siblings like "/ws-old" for root "/ws".
+ */
+export function isWithinRoot(full: string, rootResolved: string): boolean {
+  const prefix = rootResolved.endsWith(path.sep) ? rootResolved : rootResolved + path.sep;
+  return full === rootResolved || full.startsWith(prefix);
+}
+
 function resolvePath(relativePath: string, root: string): string {
   const rootResolved = path.resolve(root);
   const full = path.resolve(rootResolved, relativePath);
-  if (!full.startsWith(rootResolved)) {
+  if (!isWithinRoot(full, rootResolved)) {
     throw new Error(`Path escapes workspace: ${relativePath}`);
   }
   return full;
@@ -18,14 +28,45 @@ function resolvePath(relativePath: string, root: string): string {
 
 export async function readFile(filePath: string, root: string = WORKSPACE_ROOT): Promise<string> {
   const p = resolvePath(filePath, root);
-  const stat = await fs.stat(p).catch(() => null);
-  if (!stat || !stat.isFile()) {
-    throw new Error(`File not found: ${filePath}`);
+  // Read directly and map the failure, instead of a stat round-trip first
+  const text = await fs.readFile(p, "utf-8").catch((err: NodeJS.ErrnoException) => {
+    if (err.code === "ENOENT" || err.code === "EISDIR" || err.code === "ENOTDIR") {
+      throw new Error(`File not found: ${filePath}`);
+    }
+    throw err;
+  });
+  return `--- ${filePath} ---\n${numberLines(text)}`;
+}
+
+/**
+ * Prefix each line with a right-aligned line number ("   1 | ...").
+ * Walks newlines with indexOf and appends to one string, rather than
+ * materializing a line array and an array of formatted lines to join.
+ */
+function numberLines(text: string): string {
+  let out = "";
+  let start = 0;
+  for (let n = 1; ; n++) {
+    const end = text.indexOf("\n", start);
+    const line = end === -1 ? text.slice(start) : text.slice(start, end);
+    out += (n > 1 ? "\n" : "") + String(n).padStart(4) + " | " + line;
+    if (end === -1) return out;
+    start = end + 1;
   }
-  const text = await fs.readFile(p, "utf-8");
-  const lines = text.split("\n");
-  const numbered = lines.map((line, i) => `${String(i + 1).padStart(4)} | ${line}`).join("\n");
-  return `--- ${filePath} ---\n${numbered}`;
+}
+
+/**
+ * Read several files concurrently, in one tool round-trip. Each file is
+ * formatted like readFile; a failing path yields an inline error instead of
+ * failing the batch.
+ */
+export async function readFiles(filePaths: string[], root: string = WORKSPACE_ROOT): Promise<string> {
+  const parts = await Promise.all(
+    filePaths.map((fp) =>
+      readFile(fp, root).catch((e) => `--- ${fp} ---\nError: ${e instanceof Error ? e.message : e}`)
+    )
+  );
+  return parts.join("\n\n");
 }
 
 export async function writeFile(
@@ -51,50 +92,76 @@ export async function editFile(
     throw new Error(`File not found: ${filePath}`);
   }
   const text = await fs.readFile(p, "utf-8");
-  if (!text.includes(oldString)) {
+  const idx = text.indexOf(oldString);
+  if (idx === -1) {
     throw new Error(`old_string not found in ${filePath}`);
   }
-  const newText = text.replace(oldString, newString);
+  if (oldString === newString) return `Edited ${filePath}: no-op (old == new)`;
+  // Splice by index: String.replace would also expand "$&"-style patterns in newString
+  const newText = text.slice(0, idx) + newString + text.slice(idx + oldString.length);
   await fs.writeFile(p, newText, "utf-8");
   return `Edited ${filePath}: 1 replacement`;
 }
 
+interface SortedEntry {
+  name: string;
+  full: string;
+  isDir: boolean;
+}
+
+/**
+ * Directory entries sorted files first, then by name. Types come from
+ * readdir's d_type, so only symlinks need a stat. Throws if unreadable.
+ */
+async function readSortedEntries(dir: string): Promise<SortedEntry[]> {
+  const dirents = await fs.readdir(dir, { withFileTypes: true });
+  const entries = await Promise.all(
+    dirents.map(async (d) => {
+      const full = path.join(dir, d.name);
+      let isDir = d.isDirectory();
+      if (d.isSymbolicLink()) {
+        const s = await fs.stat(full).catch(() => null);
+        isDir = s?.isDirectory() ?? false;
+      }
+      return { name: d.name, full, isDir };
+    })
+  );
+  return entries.sort((a, b) => {
+    if (a.isDir !== b.isDir) return Number(a.isDir) - Number(b.isDir);
+    return a.name.toLowerCase().localeCompare(b.name.toLowerCase());
+  });
+}
+
+/** Recursive listings stop after this many entries so huge trees don't produce multi-MB output. */
+const MAX_LIST_ENTRIES = 500;
+
 async function walkDir(
   dir: string,
   prefix: string,
   lines: string[],
-  recursive: boolean,
-  rootResolved: string
+  budget: { remaining: number }
 ): Promise<void> {
-  let entries: { name: string; full: string; isDir: boolean }[] = [];
+  let entries: SortedEntry[];
   try {
-    const names = await fs.readdir(dir);
-    const withStat = await Promise.all(
-      names.map(async (name) => {
-        const full = path.join(dir, name);
-        const stat = await fs.stat(full).catch(() => null);
-        return { name, full, isDir: stat?.isDirectory() ?? false };
-      })
-    );
-    entries = withStat.sort((a, b) => {
-      const aFile = Number(a.isDir);
-      const bFile = Number(b.isDir);
-      if (aFile !== bFile) return aFile - bFile;
-      return a.name.toLowerCase().localeCompare(b.name.toLowerCase());
-    });
+    entries = await readSortedEntries(dir);
   } catch {
     lines.push(`${prefix}(permission denied)`);
     return;
   }
   for (let i = 0; i < entries.length; i++) {
+    if (budget.remaining <= 0) return;
+    if (--budget.remaining === 0) {
+      lines.push(`${prefix}... (listing truncated at ${MAX_LIST_ENTRIES} entries)`);
+      return;
+    }
     const e = entries[i];
     const isLast = i === entries.length - 1;
     const branch = isLast ? "└── " : "├── ";
     const suffix = e.isDir ? "/" : "";
     lines.push(`${prefix}${branch}${e.name}${suffix}`);
-    if (recursive && e.isDir) {
+    if (e.isDir) {
       const ext = isLast ? "    " : "│   ";
-      await walkDir(e.full, prefix + ext, lines, true, rootResolved);
+      await walkDir(e.full, prefix + ext, lines, budget);
     }
   }
 }
@@ -115,24 +182,10 @@ export async function listFiles(
   const lines: string[] = [];
   lines.push(dirPath + "/");
   if (recursive) {
-    await walkDir(p, "", lines, true, path.resolve(root));
+    await walkDir(p, "", lines, { remaining: MAX_LIST_ENTRIES + 1 });
   } else {
     try {
-      const names = await fs.readdir(p);
-      const withStat = await Promise.all(
-        names.map(async (name) => {
-          const full = path.join(p, name);
-          const s = await fs.stat(full).catch(() => null);
-          return { name, isDir: s?.isDirectory() ?? false };
-        })
-      );
-      const sorted = withStat.sort((a, b) => {
-        const aFile = Number(a.isDir);
-        const bFile = Number(b.isDir);
-        if (aFile !== bFile) return aFile - bFile;
-        return a.name.toLowerCase().localeCompare(b.name.toLowerCase());
-      });
-      for (const e of sorted) {
+      for (const e of await readSortedEntries(p)) {
         lines.push("├── " + e.name + (e.isDir ? "/" : ""));
       }
     } catch {
@@ -142,24 +195,64 @@ export async function listFiles(
   return lines.join("\n");
 }
 
-/** Recursively list all files under dir, relative to root. */
-async function listAllFiles(dir: string, rootResolved: string, relBase: string): Promise<string[]> {
-  const results: string[] = [];
+export interface DirEntry {
+  name: string;
+  type: "file" | "directory";
+}
+
+/** Structured single-level listing, in the same order as listFiles. */
+export async function listEntries(
+  dirPath: string = ".",
+  root: string = WORKSPACE_ROOT
+): Promise<DirEntry[]> {
+  const p = resolvePath(dirPath, root);
+  const stat = await fs.stat(p).catch(() => null);
+  if (!stat) {
+    throw new Error(`Path not found: ${dirPath}`);
+  }
+  if (!stat.isDirectory()) return [];
+  const entries = await readSortedEntries(p).catch(() => []);
+  return entries.map((e) => ({ name: e.name, type: e.isDir ? "directory" : "file" }));
+}
+
+/**
+ * Directories glob/grep never descend into: VCS metadata and installed
+ * dependencies. Generic names like dist/ or build/ stay searchable, since
+ * sketches may be saved there.
+ */
+const IGNORED_DIRS = new Set([".git", "node_modules", "__pycache__", ".venv", "venv"]);
+
+/**
+ * Recursively list all files under dir, relative to root (skipping IGNORED_DIRS).
+ * Entry types come from readdir's d_type; only symlinks are stat'ed.
+ */
+async function listAllFiles(
+  dir: string,
+  rootResolved: string,
+  relBase: string,
+  results: string[] = []
+): Promise<string[]> {
+  let dirents;
   try {
-    const names = await fs.readdir(dir);
-    for (const name of names) {
-      const full = path.join(dir, name);
-      const rel = relBase ? `${relBase}${path.sep}${name}` : name;
+    dirents = await fs.readdir(dir, { withFileTypes: true });
+  } catch {
+    return results; // permission denied, skip
+  }
+  for (const d of dirents) {
+    const full = path.join(dir, d.name);
+    const rel = relBase ? `${relBase}${path.sep}${d.name}` : d.name;
+    let isDir = d.isDirectory();
+    if (d.isSymbolicLink()) {
       const stat = await fs.stat(full).catch(() => null);
       if (!stat) continue;
-      if (stat.isDirectory()) {
-        results.push(...(await listAllFiles(full, rootResolved, rel)));
-      } else {
-        results.push(rel);
-      }
+      isDir = stat.isDirectory();
+    }
+    if (isDir) {
+      if (IGNORED_DIRS.has(d.name)) continue;
+      await listAllFiles(full, rootResolved, rel, results);
+    } else {
+      results.push(rel);
     }
-  } catch {
-    // permission denied, skip
   }
   return results;
 }
@@ -196,19 +289,46 @@ function matchGlob(relativePath: string, pattern: string): boolean {
   return i === parts.length;
 }
 
+/** Compiled wildcard segments; a glob is matched against every file, so compile each once. */
+const SEGMENT_REGEX_CACHE_SIZE = 256;
+const segmentRegexCache = new Map<string, RegExp>();
+
 function matchSegment(pat: string, name: string): boolean {
   if (pat === "*") return true;
   if (pat.includes("*")) {
-    const re = new RegExp("^" + pat.replace(/\*\*/g, ".*").replace(/\*/g, "[^/]*") + "$");
+    let re = segmentRegexCache.get(pat);
+    if (!re) {
+      re = new RegExp("^" + pat.replace(/\*\*/g, ".*").replace(/\*/g, "[^/]*") + "$");
+      if (segmentRegexCache.size >= SEGMENT_REGEX_CACHE_SIZE) segmentRegexCache.clear();
+      segmentRegexCache.set(pat, re);
+    }
     return re.test(name);
   }
   return pat === name;
 }
 
+/**
+ * Leading directory segments of a glob that contain no wildcard, e.g. "src/lib"
+ * for "src/lib/**\/*.ts". Only that subtree can match, so the walk starts there.
+ * Naming a directory explicitly opts into it, even an IGNORED_DIRS one like
+ * node_modules; only ignored dirs found below the prefix are pruned.
+ * Empty when the prefix can't be used as-is ("." or "..").
+ */
+function literalGlobPrefix(patParts: string[]): string {
+  const prefix: string[] = [];
+  for (const part of patParts.slice(0, -1)) {
+    if (part.includes("*")) break;
+    if (part === "." || part === "..") return "";
+    prefix.push(part);
+  }
+  return prefix.join(path.sep);
+}
+
 async function globMatch(pattern: string, root: string): Promise<string[]> {
   const rootResolved = path.resolve(root);
-  const all = await listAllFiles(rootResolved, rootResolved, "");
   const normalized = pattern.split("/").join(path.sep);
+  const prefix = literalGlobPrefix(normalized.split(path.sep).filter(Boolean));
+  const all = await listAllFiles(path.join(rootResolved, prefix), rootResolved, prefix);
   if (normalized === "**" + path.sep + "*" || normalized === "**/*") return all.sort();
   return all.filter((rel) => matchGlob(rel, normalized)).sort();
 }
@@ -218,37 +338,122 @@ export async function globFiles(pattern: string, root: string = WORKSPACE_ROOT):
   return matches.length ? matches.join("\n") : "(no matches)";
 }
 
+/** Bytes inspected for a NUL when deciding whether a file is binary. */
+const BINARY_SNIFF_BYTES = 8192;
+/** Files above this size are scanned as a line stream instead of read whole. */
+const STREAM_GREP_THRESHOLD_BYTES = 1024 * 1024;
+/** Files searched concurrently by grepFiles. */
+const GREP_CONCURRENCY = 16;
+
+function looksBinary(head: Buffer): boolean {
+  return head.subarray(0, BINARY_SNIFF_BYTES).includes(0);
+}
+
+async function readHead(full: string): Promise<Buffer | null> {
+  const handle = await fs.open(full, "r").catch(() => null);
+  if (!handle) return null;
+  try {
+    const buf = Buffer.alloc(BINARY_SNIFF_BYTES);
+    const { bytesRead } = await handle.read(buf, 0, BINARY_SNIFF_BYTES, 0);
+    return buf.subarray(0, bytesRead);
+  } catch {
+    return null;
+  } finally {
+    await handle.close();
+  }
+}
+
+/** Search one file, returning at most `limit` "rel:line: text" hits. Binary files are skipped. */
+async function grepFile(full: string, rel: string, re: RegExp, limit: number): Promise<string[]> {
+  const hits: string[] = [];
+  const stat = await fs.stat(full).catch(() => null);
+  if (!stat) return hits;
+
+  if (stat.size <= STREAM_GREP_THRESHOLD_BYTES) {
+    const buf = await fs.readFile(full).catch(() => null);
+    if (!buf || looksBinary(buf)) return hits;
+    const lines = buf.toString("utf-8").split("\n");
+    for (let i = 0; i < lines.length; i++) {
+      if (re.test(lines[i])) {
+        hits.push(`${rel}:${i + 1}: ${lines[i].trim()}`);
+        if (hits.length >= limit) break;
+      }
+    }
+    return hits;
+  }
+
+  // Large file: keep memory at one line rather than the whole file. Lines are
+  // split on "\n" only (readline would also break on a lone "\r"), so line
+  // numbers match the small-file path and readFile.
+  const head = await readHead(full);
+  if (!head || looksBinary(head)) return hits;
+  const stream = createReadStream(full, { encoding: "utf-8" });
+  let lineNo = 0;
+  const check = (line: string): boolean => {
+    lineNo++;
+    if (re.test(line)) hits.push(`${rel}:${lineNo}: ${line.trim()}`);
+    return hits.length >= limit;
+  };
+  try {
+    let rest = "";
+    for await (const chunk of stream as AsyncIterable<string>) {
+      const text = rest + chunk;
+      let start = 0;
+      for (let end = text.indexOf("\n"); end !== -1; end = text.indexOf("\n", start)) {
+        if (check(text.slice(start, end))) return hits;
+        start = end + 1;
+      }
+      rest = text.slice(start);
+    }
+    check(rest);
+  } catch {
+    // unreadable part-way through — keep what we found
+  } finally {
+    stream.destroy();
+  }
+  return hits;
+}
+
+/** Compiled grep patterns; the agent tends to repeat the same searches within a session. */
+const GREP_REGEX_CACHE_SIZE = 128;
+const grepRegexCache = new Map<string, RegExp>();
+
+function compileGrepPattern(pattern: string): RegExp {
+  let re = grepRegexCache.get(pattern);
+  if (!re) {
+    try {
+      re = new RegExp(pattern);
+    } catch {
+      throw new Error(`Invalid regex: ${pattern}`);
+    }
+    if (grepRegexCache.size >= GREP_REGEX_CACHE_SIZE) grepRegexCache.clear();
+    grepRegexCache.set(pattern, re);
+  }
+  return re;
+}
+
 export async function grepFiles(
   pattern: string,
   root: string = WORKSPACE_ROOT,
   globPattern: string = "**/*",
   maxMatches: number = 100
 ): Promise<string> {
-  let re: RegExp;
-  try {
-    re = new RegExp(pattern);
-  } catch {
-    throw new Error(`Invalid regex: ${pattern}`);
-  }
+  const re = compileGrepPattern(pattern);
   const rootResolved = path.resolve(root);
   const normalized = globPattern.split("/").join(path.sep);
   const files = await globMatch(normalized, root);
   const results: string[] = [];
-  for (const rel of files) {
-    const full = path.join(rootResolved, rel);
-    let text: string;
-    try {
-      text = await fs.readFile(full, "utf-8");
-    } catch {
-      continue;
-    }
-    const lines = text.split("\n");
-    for (let i = 0; i < lines.length; i++) {
-      if (re.test(lines[i])) {
-        results.push(`${rel}:${i + 1}: ${lines[i].trim()}`);
-        if (results.length >= maxMatches) {
-          return results.join("\n");
-        }
+  // Overlap file I/O across a batch; hits are still appended in sorted file order
+  for (let start = 0; start < files.length; start += GREP_CONCURRENCY) {
+    const batch = files.slice(start, start + GREP_CONCURRENCY);
+    const remaining = maxMatches - results.length;
+    const batchHits = await Promise.all(
+      batch.map((rel) => grepFile(path.join(rootResolved, rel), rel, re, remaining))
+    );
+    for (const hits of batchHits) {
+      results.push(...hits.slice(0, maxMatches - results.length));
+      if (results.length >= maxMatches) {
+        return results.join("\n");
       }
     }
   }
@@ -1,35 +1,296 @@
 /**
- * Execute code in a sandbox. Uses child_process to run Python.
+ * Execute code in a sandbox. On POSIX, Python runs through a small pool of
+ * warm fork servers: each has common heavy modules (numpy, etc.) already
+ * imported and forks a fresh child per script, so runs are isolated from one
+ * another but skip interpreter startup and those imports. Other platforms
+ * spawn one python3 process per script.
  */
 
-import { execSync } from "node:child_process";
+import { execFile, spawn, type ChildProcess } from "node:child_process";
 import { tmpdir } from "node:os";
 import path from "node:path";
 import fs from "node:fs/promises";
+import readline from "node:readline";
+import { promisify } from "node:util";
+
+const execFileAsync = promisify(execFile);
 
 const MAX_OUTPUT_BYTES = 100_000;
 const TIMEOUT_MS = 30_000;
+/** Extra time the server gets to report a timeout itself before it is killed. */
+const WORKER_GRACE_MS = 5_000;
+/** Python processes allowed at once across all sessions; extra calls queue. */
+const MAX_CONCURRENT_RUNS = 4;
+/** The fork server needs os.fork/setsid/killpg; elsewhere each run is its own python3 process. */
+const USE_FORK_SERVER = process.platform !== "win32";
+
+/**
+ * Fork server: one script path per line on stdin, one JSON result per line
+ * on stdout. Each child gets its own session (so a timeout kills anything it
+ * spawned), fds 1/2 piped back to the server, /dev/null as stdin, and runs
+ * the script as __main__ the way `python3 script.py` would.
+ */
+const WORKER_SOURCE = `
+import builtins, json, os, selectors, signal, sys, time, traceback, types
+
+LIMIT = int(sys.argv[1])
+TIMEOUT = float(sys.argv[2])
+WARM_MODULES = ("numpy", "PIL.Image")
+
+for name in WARM_MODULES:
+    try:
+        __import__(name)
+    except Exception:
+        pass
+
+def run_child(script, out_w, err_w):
+    try:
+        os.setsid()
+        null = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(null, 0)
+        os.dup2(out_w, 1)
+        os.dup2(err_w, 2)
+        for fd in (null, out_w, err_w):
+            os.close(fd)
+        sys.stdin = open(os.devnull)
+        # Forked children would otherwise share the server's numpy RNG state
+        if "numpy" in sys.modules:
+            sys.modules["numpy"].random.seed()
+        main = types.ModuleType("__main__")
+        main.__file__ = script
+        main.__builtins__ = builtins
+        sys.modules["__main__"] = main
+        sys.argv = [script]
+        sys.path[0] = os.path.dirname(script)
+        try:
+            with open(script, encoding="utf-8") as f:
+                code = compile(f.read(), script, "exec")
+            exec(code, main.__dict__)
+        except SystemExit:
+            raise
+        except BaseException:
+            etype, exc, tb = sys.exc_info()
+            traceback.print_exception(etype, exc, tb.tb_next)
+            raise SystemExit(1)
+    except SystemExit:
+        raise
+    except BaseException:
+        os._exit(70)
+    raise SystemExit(0)
+
+def kill_group(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+def run(script):
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(out_r)
+        os.close(err_r)
+        run_child(script, out_w, err_w)
+    os.close(out_w)
+    os.close(err_w)
+
+    deadline = time.monotonic() + TIMEOUT
+    bufs = {out_r: bytearray(), err_r: bytearray()}
+    error = None
+    with selectors.DefaultSelector() as sel:
+        for fd in bufs:
+            sel.register(fd, selectors.EVENT_READ)
+        while sel.get_map() and error is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                error = "Execution timed out after %gs" % TIMEOUT
+                break
+            for key, _ in sel.select(remaining):
+                chunk = os.read(key.fd, 65536)
+                if not chunk:
+                    sel.unregister(key.fd)
+                    continue
+                buf = bufs[key.fd]
+                room = LIMIT - len(buf)
+                buf += chunk[:room]
+                if len(chunk) > room:
+                    error = "Output exceeded %d bytes" % LIMIT
+    if error is not None:
+        kill_group(pid)
+    while True:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            break
+        if time.monotonic() > deadline:
+            error = error or "Execution timed out after %gs" % TIMEOUT
+            kill_group(pid)
+            _, status = os.waitpid(pid, 0)
+            break
+        time.sleep(0.002)
+    os.close(out_r)
+    os.close(err_r)
+
+    code = os.waitstatus_to_exitcode(status)
+    if error is None and code != 0:
+        error = "Process exited with code %d" % code if code > 0 else "Process killed by signal %d" % -code
+    return {
+        "ok": error is None,
+        "stdout": bufs[out_r].decode("utf-8", "replace"),
+        "stderr": bufs[err_r].decode("utf-8", "replace"),
+        "error": error,
+    }
+
+for line in sys.stdin:
+    try:
+        reply = run(json.loads(line)["script"])
+    except Exception as e:
+        reply = {"ok": False, "stdout": "", "stderr": "", "error": "Sandbox error: %s" % e}
+    sys.stdout.write(json.dumps(reply) + "\\n")
+    sys.stdout.flush()
+`;
+
+interface RunResult {
+  ok: boolean;
+  stdout: string;
+  stderr: string;
+  error: string | null;
+}
+
+class PythonWorker {
+  alive = true;
+  private proc: ChildProcess;
+  /** Why the worker died (e.g. python3 failed to spawn), reported to later run() calls. */
+  private deathReason: Error | null = null;
+  private pending: { resolve: (r: RunResult) => void; reject: (e: Error) => void } | null = null;
+
+  constructor() {
+    this.proc = spawn(
+      "python3",
+      ["-c", WORKER_SOURCE, String(MAX_OUTPUT_BYTES), String(TIMEOUT_MS / 1000)],
+      { stdio: ["pipe", "pipe", "inherit"] }
+    );
+    this.proc.stdin!.on("error", () => {});
+    readline.createInterface({ input: this.proc.stdout! }).on("line", (line) => {
+      let result: RunResult;
+      try {
+        result = JSON.parse(line) as RunResult;
+      } catch {
+        this.fail(new Error("Sandbox sent an unreadable reply"));
+        return;
+      }
+      const p = this.pending;
+      this.pending = null;
+      p?.resolve(result);
+    });
+    this.proc.on("error", (err) => this.fail(err));
+    this.proc.on("exit", (code, signal) => {
+      this.fail(new Error(`Python process exited (${signal ?? `code ${code}`})`));
+    });
+  }
+
+  run(scriptPath: string): Promise<RunResult> {
+    return new Promise((resolve, reject) => {
+      if (!this.alive) {
+        reject(this.deathReason ?? new Error("Python process is not running"));
+        return;
+      }
+      // The server enforces TIMEOUT_MS per script; this only catches a hung server
+      const timer = setTimeout(() => {
+        this.fail(new Error(`Execution timed out after ${TIMEOUT_MS / 1000}s`));
+      }, TIMEOUT_MS + WORKER_GRACE_MS);
+      this.pending = {
+        resolve: (r) => { clearTimeout(timer); resolve(r); },
+        reject: (e) => { clearTimeout(timer); reject(e); },
+      };
+      this.proc.stdin!.write(JSON.stringify({ script: scriptPath }) + "\n");
+    });
+  }
+
+  kill(): void {
+    this.alive = false;
+    this.proc.kill("SIGKILL");
+  }
+
+  private fail(err: Error): void {
+    this.deathReason ??= err;
+    const p = this.pending;
+    this.pending = null;
+    this.kill();
+    p?.reject(err);
+  }
+}
+
+const idleWorkers: PythonWorker[] = [];
+
+let activeRuns = 0;
+const waiting: (() => void)[] = [];
+
+async function acquireSlot(): Promise<void> {
+  if (activeRuns < MAX_CONCURRENT_RUNS) {
+    activeRuns++;
+    return;
+  }
+  await new Promise<void>((resolve) => waiting.push(resolve));
+}
+
+function releaseSlot(): void {
+  // Hand the slot straight to the next waiter, or free it
+  const next = waiting.shift();
+  if (next) next();
+  else activeRuns--;
+}
 
 export async function executePythonCode(code: string): Promise<string> {
+  await acquireSlot();
+  try {
+    return await runPython(code);
+  } finally {
+    releaseSlot();
+  }
+}
+
+async function runPython(code: string): Promise<string> {
   const dir = tmpdir();
   const scriptPath = path.join(dir, `chatooli_sandbox_${Date.now()}_${Math.random().toString(36).slice(2)}.py`);
   try {
     await fs.writeFile(scriptPath, code, "utf-8");
-    const result = execSync(`python3 "${scriptPath}"`, {
+    const { ok, stdout, stderr, error } = USE_FORK_SERVER
+      ? await runInWorker(scriptPath)
+      : await runInProcess(scriptPath);
+    if (ok) return stdout ? `Output:\n${stdout}` : "Code executed successfully (no output).";
+    const parts: string[] = [];
+    if (stdout) parts.push(`Output before error:\n${stdout}`);
+    parts.push(`Error:\n${stderr || error}`);
+    return parts.join("\n");
+  } catch (err: unknown) {
+    return `Error:\n${err instanceof Error ? err.message : String(err)}`;
+  } finally {
+    await fs.unlink(scriptPath).catch(() => {});
+  }
+}
+
+async function runInWorker(scriptPath: string): Promise<RunResult> {
+  let worker = idleWorkers.pop();
+  while (worker && !worker.alive) worker = idleWorkers.pop();
+  worker ??= new PythonWorker();
+  try {
+    return await worker.run(scriptPath);
+  } finally {
+    if (worker.alive) idleWorkers.push(worker);
+  }
+}
+
+async function runInProcess(scriptPath: string): Promise<RunResult> {
+  try {
+    const { stdout } = await execFileAsync("python3", [scriptPath], {
       encoding: "utf-8",
       timeout: TIMEOUT_MS,
       maxBuffer: MAX_OUTPUT_BYTES,
     });
-    return result ? `Output:\n${result}` : "Code executed successfully (no output).";
+    return { ok: true, stdout, stderr: "", error: null };
   } catch (err: unknown) {
     const e = err as { stdout?: string; stderr?: string; message?: string };
-    const stdout = (e.stdout ?? "") as string;
-    const stderr = (e.stderr ?? "") as string;
-    const parts: string[] = [];
-    if (stdout) parts.push(`Output before error:\n${stdout}`);
-    parts.push(`Error:\n${stderr || e.message || String(e)}`);
-    return parts.join("\n");
-  } finally {
-    await fs.unlink(scriptPath).catch(() => {});
+    return { ok: false, stdout: e.stdout ?? "", stderr: e.stderr ?? "", error: e.message ?? String(e) };
   }
 }
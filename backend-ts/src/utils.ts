@@ -7,30 +7,27 @@ export interface CodeBlock {
   code: string;
 }
 
+/**
+ * Fenced code block: an opening ``` line (with optional language hint), then
+ * whole lines up to the next line starting with ``` — or end of text for an
+ * unclosed trailing block. Lines are split on "\n" only and "leading
+ * whitespace" is anything trimStart() strips, so a lone "\r" or U+2028 is
+ * line content, not a line break (the `m` flag would treat it as one).
+ */
+const CODE_BLOCK_RE =
+  /(?:^|\n)[^\S\n]*```([^\n]*)\n((?:(?![^\S\n]*```)[^\n]*\n)*)(?:([^\S\n]*)```[^\n]*|([^\n]*))/g;
+
 export function extractCodeBlocks(text: string): CodeBlock[] {
   const blocks: CodeBlock[] = [];
-  const lines = text.split("\n");
-  let inCode = false;
-  let currentCode: string[] = [];
-  let lang = "python";
-
-  for (const line of lines) {
-    if (line.trimStart().startsWith("```")) {
-      if (inCode) {
-        blocks.push({ language: lang, code: currentCode.join("\n") });
-        currentCode = [];
-        inCode = false;
-      } else {
-        inCode = true;
-        const langHint = line.trimStart().replace(/`/g, "").trim();
-        lang = langHint || "python";
-      }
-    } else if (inCode) {
-      currentCode.push(line);
-    }
-  }
-  if (currentCode.length > 0) {
-    blocks.push({ language: lang, code: currentCode.join("\n") });
+  // Plain-prose replies are common; a substring search rules them out
+  // before the line-anchored regex walks every line start.
+  if (!text.includes("```")) return blocks;
+  for (const m of text.matchAll(CODE_BLOCK_RE)) {
+    const lang = m[1].replace(/`/g, "").trim() || "python";
+    // A closing fence leaves the newline that preceded it in the body;
+    // an unclosed block also keeps its final unterminated line
+    const code = m[3] !== undefined ? m[2].slice(0, -1) : m[2] + m[4];
+    blocks.push({ language: lang, code });
   }
   return blocks;
 }